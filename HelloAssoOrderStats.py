@@ -1,3 +1,4 @@
+import argparse
 import logging
 import requests
 import smtplib
@@ -5,22 +6,25 @@ from rich.logging import RichHandler
 from rich.console import Console
 
 # Importations depuis les nouveaux modules
-from src.config import app_config
 from src.api import get_access_token, get_orders
 from src.processing import (
     calculate_sales_summary,
-    get_best_seller,
-    aggregate_sales_by_date
+    get_best_seller
 )
+from src.timeseries import build_sales_series
+from src.parrains import build_parrain_resolver
 from src.reporting import (
+    build_orders_rows,
     save_orders_to_csv,
     save_summary_to_csv,
     plot_sales_over_time,
     log_sales_summary,
     log_daily_sales,
     log_parrain_sales,
-    send_email
+    log_unmatched_parrain_codes
 )
+from src.delivery import send_reports
+from src.server import serve
 
 # Initialisation de la console Rich
 console = Console()
@@ -36,9 +40,23 @@ logging.basicConfig(
 
 logger = logging.getLogger("rich")
 
-def main():
+def parse_args():
+    """Analyse les arguments de la ligne de commande."""
+    parser = argparse.ArgumentParser(description="Rapport de ventes HelloAsso.")
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help="Lance un serveur HTTP local (tableau de bord et API JSON) au lieu d'envoyer le rapport."
+    )
+    return parser.parse_args()
+
+def main(args):
     """Point d'entrée principal du script."""
     try:
+        if args.serve:
+            serve()
+            return
+
         # 1. Authentification et récupération des données
         logger.info("Récupération du jeton d'accès...")
         access_token = get_access_token()
@@ -51,42 +69,45 @@ def main():
         logger.info("Calcul des ventes...")
         summary, total_revenue, total_profit = calculate_sales_summary(orders)
 
-        logger.info("Agrégation des ventes par date...")
-        sales_per_day = aggregate_sales_by_date(orders)
+        logger.info("Agrégation des ventes par période...")
+        sales_series = build_sales_series(orders)
 
         logger.info("Détermination du meilleur vendeur...")
-        parrain_sales = get_best_seller(orders)
+        parrain_resolver = build_parrain_resolver()
+        parrain_sales = get_best_seller(orders, parrain_resolver)
 
         # 3. Génération des rapports
         logger.info("Enregistrement des commandes dans un fichier CSV...")
-        save_orders_to_csv(orders)
+        orders_table = build_orders_rows(orders)
+        save_orders_to_csv(orders_table)
 
         logger.info("Enregistrement du résumé des ventes dans un fichier CSV...")
         save_summary_to_csv(summary, total_revenue, total_profit)
 
         logger.info("Génération du graphique des ventes...")
-        plot_sales_over_time(sales_per_day)
+        plot_sales_over_time(sales_series)
 
         # 4. Affichage des résultats dans la console
         logger.info("Affichage du résumé des ventes...")
         log_sales_summary(summary, total_revenue, total_profit, num_orders)
 
-        logger.info("Affichage des ventes quotidiennes...")
-        log_daily_sales(sales_per_day)
+        logger.info("Affichage des ventes par période...")
+        log_daily_sales(sales_series)
 
         logger.info("Affichage des ventes par code parrain...")
         log_parrain_sales(parrain_sales)
+        if parrain_resolver:
+            log_unmatched_parrain_codes(parrain_resolver.unmatched)
 
         # 5. Envoi de l'e-mail
         logger.info("Envoi du rapport par e-mail...")
-        send_email(
+        send_reports(
+            orders_table,
             summary,
             parrain_sales,
-            app_config.email['recipient'],
-            num_orders,
             total_revenue,
             total_profit,
-            sales_per_day
+            sales_series
         )
 
         logger.info("Le script s'est terminé avec succès.")
@@ -101,4 +122,4 @@ def main():
         logger.error(f"Une erreur critique et inattendue est survenue : {e}", exc_info=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(parse_args())
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""Mesure le débit de résolution des codes parrains (10 000 codes distincts).
+
+Usage : python -m benchmarks.bench_parrain_resolver
+"""
+import os
+import random
+import string
+import time
+
+# La configuration est chargée à l'import de src : à défaut d'une autre, celle des tests suffit.
+os.environ.setdefault('HELLOASSO_CONFIG', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'config.test.ini'))
+
+from src.parrains import ParrainResolver, levenshtein_distance, split_parrain_code
+from src.processing import normalize_parrain_code
+
+ROSTER_SIZE = 3000
+NUM_CODES = 10_000
+MAX_DISTANCE = 2
+NAIVE_SAMPLE = 100
+
+def random_code(rng):
+    """Génère un code parrain du type 'NOM 4B'."""
+    nom = ''.join(rng.choices(string.ascii_uppercase, k=rng.randint(4, 10)))
+    return f"{nom} {rng.randint(3, 6)}{rng.choice('ABCDEFGHIJ')}"
+
+def add_typo(code, rng):
+    """Introduit une faute de frappe dans le nom d'un code."""
+    nom, classe = code.split(' ')
+    pos = rng.randrange(len(nom))
+    letter = rng.choice(string.ascii_uppercase)
+    nom = rng.choice([
+        nom[:pos] + letter + nom[pos + 1:],
+        nom[:pos] + nom[pos + 1:],
+        nom[:pos] + letter + nom[pos:]
+    ])
+    return f"{nom.lower()} {classe[0]}e {classe[1]}"
+
+def main():
+    rng = random.Random(42)
+    roster = sorted({random_code(rng) for _ in range(ROSTER_SIZE)})
+
+    answers = set()
+    while len(answers) < NUM_CODES:
+        if rng.random() < 0.8:
+            answers.add(add_typo(rng.choice(roster), rng))
+        else:
+            answers.add(random_code(rng).lower())
+    answers = list(answers)
+
+    start = time.perf_counter()
+    resolver = ParrainResolver(roster, MAX_DISTANCE)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for answer in answers:
+        resolver.resolve(answer)
+    cold_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for answer in answers:
+        resolver.resolve(answer)
+    warm_time = time.perf_counter() - start
+
+    # Référence : comparaison de chaque code à toute la liste, avec la même borne et la même
+    # règle de classe que le résolveur, mesurée sur un échantillon
+    known_codes = [split_parrain_code(known) for known in roster]
+    sample = [split_parrain_code(normalize_parrain_code(answer)) for answer in answers[:NAIVE_SAMPLE]]
+    start = time.perf_counter()
+    for name, classe in sample:
+        min(
+            ((levenshtein_distance(name, known_name, MAX_DISTANCE), known_name)
+             for known_name, known_classe in known_codes if known_classe == classe),
+            default=None
+        )
+    naive_time = (time.perf_counter() - start) / len(sample) * NUM_CODES
+
+    print(f"Liste des parrains : {len(roster)} codes, index construit en {build_time:.3f} s")
+    print(f"Résolution de {NUM_CODES} codes distincts : {cold_time:.3f} s ({NUM_CODES / cold_time:,.0f} codes/s)")
+    print(f"Comparaison naïve (extrapolée depuis {NAIVE_SAMPLE} codes) : {naive_time:.1f} s, soit x{naive_time / cold_time:,.0f}")
+    print(f"Résolution mémorisée : {warm_time:.4f} s ({NUM_CODES / warm_time:,.0f} codes/s)")
+    print(f"Codes non reconnus : {len(resolver.unmatched)}")
+
+if __name__ == "__main__":
+    main()
@@ -53,15 +53,29 @@ def save_access_token(token_data):
         json.dump(token_data, f)
     return access_token
 
-def get_orders(access_token):
-    """Récupère toutes les commandes, en utilisant un cache si disponible."""
-    # Vérifier si le cache est activé et valide
+def load_cached_orders():
+    """Retourne les commandes du cache s'il est activé et encore valide, sinon None."""
     if app_config.cache['enabled'] and os.path.exists(app_config.cache_file):
         file_mod_time = datetime.fromtimestamp(os.path.getmtime(app_config.cache_file))
         if datetime.now() - file_mod_time < timedelta(hours=app_config.cache['max_age_hours']):
             logger.info("Utilisation du cache pour les commandes.")
             with open(app_config.cache_file, 'r', encoding='utf-8') as f:
                 return json.load(f)
+    return None
+
+def fetch_orders():
+    """Récupère les commandes depuis le cache si possible ; le jeton d'accès n'est demandé que pour l'API."""
+    cached_orders = load_cached_orders()
+    if cached_orders is not None:
+        return cached_orders
+    return get_orders(get_access_token())
+
+def get_orders(access_token):
+    """Récupère toutes les commandes, en utilisant un cache si disponible."""
+    # Vérifier si le cache est activé et valide
+    cached_orders = load_cached_orders()
+    if cached_orders is not None:
+        return cached_orders
 
     # Si le cache n'est pas utilisé, récupérer depuis l'API
     logger.info("Récupération des commandes depuis l'API HelloAsso...")
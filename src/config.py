@@ -1,16 +1,17 @@
 import configparser
 import os
 from decimal import Decimal, InvalidOperation
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import logging
 
 # Configuration du journal (logging)
 logger = logging.getLogger("rich")
 
 def load_config():
-    """Charge la configuration depuis le fichier config.ini."""
+    """Charge la configuration depuis le fichier config.ini (ou celui indiqué par HELLOASSO_CONFIG)."""
     config = configparser.ConfigParser()
     script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    config_file_path = os.path.join(script_dir, 'config.ini')
+    config_file_path = os.environ.get('HELLOASSO_CONFIG') or os.path.join(script_dir, 'config.ini')
     config.read(config_file_path)
     return config
 
@@ -34,10 +35,33 @@ def get_smtp_config(config):
 
 def get_email_config(config):
     """Récupère la configuration de l'e-mail."""
+    compression = config.get('email', 'compression', fallback='none').strip().lower()
+    if compression not in ('none', 'zip', 'gzip'):
+        raise ValueError(f"Valeur de compression inconnue '{compression}' dans la section [email] (none, zip ou gzip).")
     return {
-        'recipient': config.get('email', 'recipient')
+        'compression': compression,
+        'compression_threshold': config.getint('email', 'compression_threshold_kb', fallback=512) * 1024
     }
 
+def get_recipients_config(config):
+    """Récupère la liste des destinataires et, pour chacun, les produits de son rapport.
+
+    Les destinataires de [email] reçoivent le rapport complet (products = None) ; ceux de la
+    section facultative [recipients] ne reçoivent que les produits indiqués.
+    """
+    recipients = [
+        {'email': email.strip(), 'products': None}
+        for email in config.get('email', 'recipient').split(',') if email.strip()
+    ]
+    if config.has_section('recipients'):
+        defaults = config.defaults()
+        for email in config['recipients']:
+            if email in defaults:
+                continue
+            products = [p.strip() for p in config.get('recipients', email).split(',') if p.strip()]
+            recipients.append({'email': email.strip(), 'products': products or None})
+    return recipients
+
 def get_product_config(config):
     """Récupère la configuration des produits."""
     products_prices = {}
@@ -60,6 +84,14 @@ def get_parrain_config(config):
     """Récupère la configuration du produit parrain."""
     return config.get('parameters', 'parrain_product_name')
 
+def get_parrain_roster_config(config):
+    """Récupère la configuration de la liste des parrains connus (facultative)."""
+    roster_file = config.get('parameters', 'parrain_roster_file', fallback='').strip()
+    return {
+        'roster_file': roster_file or None,
+        'max_distance': config.getint('parameters', 'parrain_max_distance', fallback=2)
+    }
+
 def validate_config(config):
     """Valide que toutes les clés de configuration nécessaires sont présentes."""
     required = {
@@ -86,6 +118,33 @@ def get_cache_config(config):
         'max_age_hours': config.getint('cache', 'max_age_hours', fallback=1)
     }
 
+def get_timeseries_config(config):
+    """Récupère la configuration des séries temporelles (fuseau horaire, granularité, moyenne mobile)."""
+    timezone = config.get('timeseries', 'timezone', fallback='Europe/Paris').strip()
+    granularity = config.get('timeseries', 'granularity', fallback='day').strip().lower()
+    rolling_window = config.getint('timeseries', 'rolling_window', fallback=7)
+    try:
+        ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Fuseau horaire inconnu '{timezone}' dans la section [timeseries].")
+    if granularity not in ('hour', 'day', 'week'):
+        raise ValueError(f"Granularité inconnue '{granularity}' dans la section [timeseries] (hour, day ou week).")
+    if rolling_window < 1:
+        raise ValueError("L'option 'rolling_window' de la section [timeseries] doit être supérieure ou égale à 1.")
+    return {
+        'timezone': timezone,
+        'granularity': granularity,
+        'rolling_window': rolling_window
+    }
+
+def get_server_config(config):
+    """Récupère la configuration du serveur HTTP (mode --serve)."""
+    return {
+        'host': config.get('server', 'host', fallback='127.0.0.1'),
+        'port': config.getint('server', 'port', fallback=8000),
+        'refresh_minutes': config.getint('server', 'refresh_minutes', fallback=15)
+    }
+
 class AppConfig:
     """Classe de configuration pour l'application."""
     def __init__(self):
@@ -94,9 +153,13 @@ class AppConfig:
         self.helloasso = get_helloasso_config(config)
         self.smtp = get_smtp_config(config)
         self.email = get_email_config(config)
+        self.recipients = get_recipients_config(config)
         self.products_prices, self.product_costs = get_product_config(config)
         self.parrain_product_name = get_parrain_config(config)
+        self.parrain_roster = get_parrain_roster_config(config)
         self.cache = get_cache_config(config)
+        self.timeseries = get_timeseries_config(config)
+        self.server = get_server_config(config)
 
         self.api_base_url = "https://api.helloasso.com/v5"
         self.auth_url = "https://api.helloasso.com/oauth2/token"
@@ -0,0 +1,188 @@
+import csv
+import gzip
+import io
+import smtplib
+import ssl
+import zipfile
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.mime.application import MIMEApplication
+from email.mime.image import MIMEImage
+from datetime import datetime
+from decimal import Decimal
+import logging
+import os
+
+from src.config import app_config
+from src.processing import normalize_product_name
+from src.reporting import (
+    SUMMARY_CSV_HEADER,
+    ORDERS_CSV_BASE_COLUMNS,
+    build_summary_rows,
+    generate_summary_html_table,
+    generate_daily_sales_table_html,
+    generate_parrain_sales_table_html
+)
+
+logger = logging.getLogger("rich")
+
+PLOT_FILENAME = 'sales_over_time.png'
+
+def compress_attachment(filename, data, method, threshold):
+    """Compresse une pièce jointe (zip ou gzip) si elle dépasse le seuil ; retourne (nom, données)."""
+    if method == 'none' or len(data) < threshold:
+        return filename, data
+    if method == 'gzip':
+        return f"{filename}.gz", gzip.compress(data, mtime=0)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(filename, data)
+    return f"{os.path.splitext(filename)[0]}.zip", buffer.getvalue()
+
+def summary_to_csv_bytes(summary, total_revenue, total_profit):
+    """Sérialise le résumé des ventes au format CSV, en mémoire."""
+    output = io.StringIO(newline='')
+    writer = csv.writer(output)
+    writer.writerow(SUMMARY_CSV_HEADER)
+    writer.writerows(build_summary_rows(summary, total_revenue, total_profit))
+    return output.getvalue().encode('utf-8')
+
+def orders_to_csv_bytes(fieldnames, rows):
+    """Sérialise les lignes des commandes au format CSV, en mémoire."""
+    output = io.StringIO(newline='')
+    writer = csv.DictWriter(output, fieldnames=fieldnames, extrasaction='ignore')
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue().encode('utf-8')
+
+def filter_summary(summary, products):
+    """Restreint le résumé des ventes aux produits indiqués ; retourne (résumé, CA, bénéfice)."""
+    filtered = {product: data for product, data in summary.items() if product in products}
+    total_revenue = sum((data['revenue'] for data in filtered.values()), Decimal('0.00'))
+    total_profit = sum((data['profit'] for data in filtered.values()), Decimal('0.00'))
+    return filtered, total_revenue, total_profit
+
+def filter_orders_rows(fieldnames, rows, products):
+    """Restreint le fichier des commandes aux colonnes et commandes des produits indiqués."""
+    product_columns = [name for name in fieldnames if name in products]
+    filtered_rows = [row for row in rows if any(row[name] for name in product_columns)]
+    return ORDERS_CSV_BASE_COLUMNS + product_columns, filtered_rows
+
+def build_report(orders_table, summary, total_revenue, total_profit, products=None):
+    """Prépare le contenu d'un rapport (complet, ou limité à certains produits)."""
+    fieldnames, rows = orders_table
+    if products is not None:
+        summary, total_revenue, total_profit = filter_summary(summary, products)
+        fieldnames, rows = filter_orders_rows(fieldnames, rows, products)
+
+    method = app_config.email['compression']
+    threshold = app_config.email['compression_threshold']
+    attachments = [
+        compress_attachment('orders.csv', orders_to_csv_bytes(fieldnames, rows), method, threshold),
+        compress_attachment('sales_summary.csv', summary_to_csv_bytes(summary, total_revenue, total_profit), method, threshold)
+    ]
+    return {
+        'summary_html': generate_summary_html_table(summary, total_revenue, total_profit),
+        'num_orders': len(rows),
+        'attachments': attachments
+    }
+
+def build_message(recipient_email, subject, body_html, attachments, plot_data):
+    """Construit l'e-mail : corps HTML avec le graphique intégré une seule fois, puis les pièces jointes."""
+    msg = MIMEMultipart('mixed')
+    msg["From"] = app_config.smtp['user']
+    msg["To"] = recipient_email
+    msg["Subject"] = subject
+
+    related_part = MIMEMultipart('related')
+    msg.attach(related_part)
+    alternative_part = MIMEMultipart('alternative')
+    related_part.attach(alternative_part)
+    alternative_part.attach(MIMEText("Veuillez activer l'affichage HTML pour voir ce rapport.", "plain", "utf-8"))
+    alternative_part.attach(MIMEText(body_html, "html", "utf-8"))
+
+    if plot_data is not None:
+        image = MIMEImage(plot_data, 'png')
+        image.add_header('Content-ID', '<sales_plot>')
+        image.add_header('Content-Disposition', 'inline', filename=PLOT_FILENAME)
+        related_part.attach(image)
+
+    for filename, data in attachments:
+        part = MIMEApplication(data, Name=filename)
+        part['Content-Disposition'] = f'attachment; filename="{filename}"'
+        msg.attach(part)
+    return msg
+
+def build_messages(orders_table, summary, parrain_sales, total_revenue, total_profit, sales_series):
+    """Construit un e-mail par destinataire ; les rapports identiques ne sont préparés qu'une fois."""
+    operation_name = app_config.helloasso['operation']
+    current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    subject = f"[{operation_name}] Résumé des Ventes au {current_date}"
+
+    daily_sales_table_html = generate_daily_sales_table_html(sales_series)
+    parrain_sales_html = generate_parrain_sales_table_html(parrain_sales)
+
+    plot_data = None
+    try:
+        with open(os.path.join(app_config.script_dir, PLOT_FILENAME), 'rb') as img:
+            plot_data = img.read()
+    except Exception as e:
+        logger.error(f"Erreur d'intégration du graphique : {e}")
+
+    known_products = {normalize_product_name(product) for product in app_config.products_prices}
+    reports = {}
+    messages = []
+    for recipient in app_config.recipients:
+        products = recipient['products']
+        key = None if products is None else frozenset(normalize_product_name(p) for p in products)
+        if key is not None and not key <= known_products:
+            unknown = ', '.join(sorted(key - known_products))
+            logger.warning(f"Produits inconnus dans [recipients] pour {recipient['email']} : {unknown}.")
+        if key not in reports:
+            reports[key] = build_report(orders_table, summary, total_revenue, total_profit, key)
+        report = reports[key]
+
+        email_body_html = f"""
+    <html><body>
+        <p>Bonjour,</p>
+        <p>Résumé des ventes au {current_date}, {report['num_orders']} commandes :</p>
+        {report['summary_html']}
+        <p><img src="cid:sales_plot" alt="Graphique des ventes" style="max-width: 100%;"/></p>
+        {daily_sales_table_html}
+        {parrain_sales_html}
+        <p>Cordialement,<br/>Votre équipe</p>
+    </body></html>
+    """
+        messages.append(build_message(recipient['email'], subject, email_body_html, report['attachments'], plot_data))
+    return messages
+
+def open_smtp_connection():
+    """Ouvre et authentifie la connexion SMTP partagée par tous les envois."""
+    context = ssl.create_default_context()
+    server = smtplib.SMTP_SSL(app_config.smtp['server'], app_config.smtp['port'], context=context)
+    try:
+        server.login(app_config.smtp['user'], app_config.smtp['password'])
+    except Exception:
+        server.close()
+        raise
+    return server
+
+def send_reports(orders_table, summary, parrain_sales, total_revenue, total_profit, sales_series):
+    """Envoie le rapport à chaque destinataire sur une seule connexion SMTP.
+
+    orders_table est le résultat de build_orders_rows, déjà calculé pour orders.csv.
+    """
+    messages = build_messages(orders_table, summary, parrain_sales, total_revenue, total_profit, sales_series)
+    sent = 0
+    try:
+        with open_smtp_connection() as server:
+            for msg in messages:
+                try:
+                    server.send_message(msg)
+                    sent += 1
+                    logger.info(f"E-mail envoyé avec succès à {msg['To']}.")
+                except smtplib.SMTPException as e:
+                    logger.error(f"Erreur d'envoi de l'e-mail à {msg['To']} : {e}")
+    except Exception as e:
+        logger.error(f"Erreur d'envoi de l'e-mail : {e}")
+    return sent
@@ -0,0 +1,182 @@
+from collections import Counter, defaultdict
+import logging
+import os
+import re
+
+from src.config import app_config
+from src.processing import normalize_parrain_code
+
+logger = logging.getLogger("rich")
+
+def levenshtein_distance(a, b, max_distance=None):
+    """Calcule la distance d'édition (Levenshtein) entre deux chaînes.
+
+    Si max_distance est fourni, le calcul s'arrête dès que cette distance est dépassée
+    et la valeur max_distance + 1 est retournée.
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    if not b:
+        return len(a)
+    previous_row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current_row = [i]
+        for j, cb in enumerate(b, 1):
+            current_row.append(min(
+                previous_row[j] + 1,
+                current_row[j - 1] + 1,
+                previous_row[j - 1] + (ca != cb)
+            ))
+        if max_distance is not None and min(current_row) > max_distance:
+            return max_distance + 1
+        previous_row = current_row
+    return previous_row[-1]
+
+def ngrams(code, n=3):
+    """Découpe un code en n-grammes, avec bourrage aux extrémités."""
+    padded = f"{'^' * (n - 1)}{code}{'$' * (n - 1)}"
+    return Counter(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+class NGramIndex:
+    """Index inversé de n-grammes pour la recherche approchée de codes par distance d'édition.
+
+    Une modification détruit au plus n n-grammes : un code à distance k de la requête partage
+    donc au moins len(requête) + n - 1 - k * n n-grammes avec elle. Il suffit alors de parcourir
+    les listes des n-grammes les plus rares de la requête pour trouver tous les candidats, sans
+    toucher aux n-grammes communs à presque tous les codes.
+    """
+    def __init__(self, words=(), n=3):
+        self.n = n
+        self.words = []
+        self.word_grams = []
+        self.postings = defaultdict(list)
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        """Ajoute un code à l'index."""
+        word_id = len(self.words)
+        self.words.append(word)
+        grams = ngrams(word, self.n)
+        self.word_grams.append(grams)
+        for gram in grams:
+            self.postings[gram].append(word_id)
+
+    def candidates(self, word, max_distance):
+        """Retourne les identifiants des codes pouvant être à au plus max_distance de word."""
+        grams = ngrams(word, self.n)
+        min_shared = len(word) + self.n - 1 - max_distance * self.n
+        if min_shared <= 0:
+            # Code trop court pour que le filtre soit sûr : tous les codes sont candidats.
+            return range(len(self.words))
+
+        candidates = set()
+        remaining = sum(grams.values())
+        for gram in sorted(grams, key=lambda g: len(self.postings.get(g, ()))):
+            if remaining < min_shared:
+                break
+            candidates.update(self.postings.get(gram, ()))
+            remaining -= grams[gram]
+        return candidates
+
+    def search(self, word, max_distance):
+        """Retourne la liste des (distance, code) à au plus max_distance de word."""
+        grams = ngrams(word, self.n)
+        results = []
+        for word_id in self.candidates(word, max_distance):
+            candidate = self.words[word_id]
+            if abs(len(candidate) - len(word)) > max_distance:
+                continue
+            candidate_grams = self.word_grams[word_id]
+            shared = sum(min(count, candidate_grams[gram]) for gram, count in grams.items())
+            if shared < max(len(candidate), len(word)) + self.n - 1 - max_distance * self.n:
+                continue
+            distance = levenshtein_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                results.append((distance, candidate))
+        return results
+
+    def __len__(self):
+        return len(self.words)
+
+def load_parrain_roster(roster_file):
+    """Charge la liste des codes parrains connus (un code par ligne, '#' pour les commentaires)."""
+    if not os.path.isabs(roster_file):
+        roster_file = os.path.join(app_config.script_dir, roster_file)
+    roster = []
+    seen = set()
+    with open(roster_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            code = normalize_parrain_code(line)
+            if code not in seen:
+                seen.add(code)
+                roster.append(code)
+    logger.info(f"{len(roster)} codes parrains chargés depuis {roster_file}.")
+    return roster
+
+def split_parrain_code(code):
+    """Sépare un code normalisé « NOM 4B » en (nom, classe) ; classe vaut None si le code n'en a pas."""
+    match = re.fullmatch(r'(.+) ([0-9][A-Z])', code)
+    if not match:
+        return code, None
+    return match.group(1), match.group(2)
+
+class ParrainResolver:
+    """Associe les codes parrains saisis librement au code connu le plus proche.
+
+    Seul le nom est rapproché par distance d'édition : la classe doit correspondre exactement,
+    pour ne jamais attribuer les ventes au parrain homonyme d'une autre classe.
+    """
+    def __init__(self, roster, max_distance=2):
+        self.roster = set(roster)
+        self.max_distance = max_distance
+        names_by_class = defaultdict(list)
+        for code in sorted(self.roster):
+            name, classe = split_parrain_code(code)
+            names_by_class[classe].append(name)
+        self.indexes = {classe: NGramIndex(names) for classe, names in names_by_class.items()}
+        self.unmatched = Counter()
+        self._cache = {}
+
+    def resolve(self, raw_answer):
+        """Retourne le code parrain retenu pour une réponse brute (résultat mémorisé)."""
+        try:
+            code, matched = self._cache[raw_answer]
+        except KeyError:
+            code, matched = self._match(normalize_parrain_code(raw_answer))
+            self._cache[raw_answer] = (code, matched)
+        if not matched:
+            self.unmatched[code] += 1
+        return code
+
+    def _match(self, code):
+        """Cherche le code connu le plus proche ; renvoie (code, trouvé)."""
+        if not code:
+            # Réponse vide : ignorée par get_best_seller, rien à signaler
+            return code, True
+        if code in self.roster:
+            return code, True
+        name, classe = split_parrain_code(code)
+        index = self.indexes.get(classe)
+        if index is None:
+            return code, False
+        candidates = index.search(name, self.max_distance)
+        if not candidates:
+            return code, False
+        _, best = min(candidates)
+        return (best if classe is None else f"{best} {classe}"), True
+
+def build_parrain_resolver():
+    """Construit le résolveur à partir de la configuration, ou None si aucune liste n'est définie."""
+    roster_file = app_config.parrain_roster['roster_file']
+    if not roster_file:
+        return None
+    roster = load_parrain_roster(roster_file)
+    return ParrainResolver(roster, app_config.parrain_roster['max_distance'])
@@ -45,8 +45,11 @@ def normalize_product_name(product_name):
         if unicodedata.category(c) != 'Mn'
     ).lower().strip()
 
-def calculate_sales_summary(orders):
-    """Calcule le résumé des ventes pour une liste de commandes."""
+def calculate_sales_summary(orders, show_progress=True):
+    """Calcule le résumé des ventes pour une liste de commandes.
+
+    show_progress=False désactive la barre de progression (mode serveur, où elle se mêlerait aux logs).
+    """
     sales_summary = defaultdict(lambda: {
         'quantity': 0,
         'revenue': Decimal('0.00'),
@@ -56,7 +59,7 @@ def calculate_sales_summary(orders):
     total_revenue = Decimal('0.00')
     total_profit = Decimal('0.00')
 
-    with Progress() as progress:
+    with Progress(disable=not show_progress) as progress:
         task = progress.add_task("[cyan]Calcul du résumé des ventes...", total=len(orders))
         for order in orders:
             payer_email = order.get("payer", {}).get("email")
@@ -96,12 +99,16 @@ def calculate_sales_summary(orders):
 
     return sales_summary, total_revenue, total_profit
 
-def get_best_seller(orders):
-    """Détermine le meilleur vendeur basé sur les codes parrains."""
+def get_best_seller(orders, resolver=None, show_progress=True):
+    """Détermine le meilleur vendeur basé sur les codes parrains.
+
+    Si un résolveur est fourni, chaque code saisi est rapproché de la liste des parrains connus.
+    show_progress=False désactive la barre de progression.
+    """
     parrain_sales = defaultdict(lambda: {'quantity': 0, 'revenue': Decimal('0.00')})
     parrain_product_name_normalized = normalize_product_name(app_config.parrain_product_name)
 
-    with Progress() as progress:
+    with Progress(disable=not show_progress) as progress:
         task = progress.add_task("[cyan]Calcul du meilleur vendeur...", total=len(orders))
         for order in orders:
             parrain_code = None
@@ -110,7 +117,10 @@ def get_best_seller(orders):
                     custom_fields = item.get("customFields", [])
                     if custom_fields:
                         parrain_code_raw = custom_fields[0].get("answer", "").strip()
-                        parrain_code = normalize_parrain_code(parrain_code_raw)
+                        if resolver:
+                            parrain_code = resolver.resolve(parrain_code_raw)
+                        else:
+                            parrain_code = normalize_parrain_code(parrain_code_raw)
                     break
 
             if parrain_code:
@@ -134,14 +144,4 @@ def get_best_seller(orders):
                     parrain_sales[parrain_code]['revenue'] += total_price
             progress.update(task, advance=1)
 
-    return parrain_sales
-
-def aggregate_sales_by_date(orders):
-    """Aggrège les ventes par date."""
-    sales_per_day = defaultdict(lambda: {'revenue': 0, 'order_count': 0})
-    for order in orders:
-        date_str = order['date'][:10]
-        total_order_amount = order['amount']['total']
-        sales_per_day[date_str]['revenue'] += total_order_amount
-        sales_per_day[date_str]['order_count'] += 1
-    return sales_per_day
\ No newline at end of file
+    return parrain_sales
\ No newline at end of file
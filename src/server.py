@@ -0,0 +1,253 @@
+import hashlib
+from html import escape
+import io
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+
+from src.config import app_config
+from src.api import fetch_orders
+from src.processing import (
+    calculate_sales_summary,
+    get_best_seller
+)
+from src.parrains import build_parrain_resolver
+from src.timeseries import build_sales_series
+from src.reporting import (
+    plot_sales_over_time,
+    generate_summary_html_table,
+    generate_daily_sales_table_html,
+    generate_parrain_sales_table_html
+)
+
+logger = logging.getLogger("rich")
+
+# Attente maximale du thread de rafraîchissement à l'arrêt (il peut être bloqué sur l'API)
+STOP_TIMEOUT_SECONDS = 5
+
+def to_amount(value):
+    """Convertit un montant (Decimal ou float) en nombre JSON arrondi au centime."""
+    return float(round(value, 2))
+
+def summary_payload(summary, total_revenue, total_profit, num_orders):
+    """Construit la réponse JSON du résumé des ventes."""
+    sorted_summary = sorted(summary.items(), key=lambda x: x[1]['quantity'], reverse=True)
+    return {
+        'num_orders': num_orders,
+        'total_revenue': to_amount(total_revenue),
+        'total_profit': to_amount(total_profit),
+        'products': [
+            {
+                'product': product,
+                'quantity': data['quantity'],
+                'revenue': to_amount(data['revenue']),
+                'profit': to_amount(data['profit']),
+                'buyers': data['buyers'],
+                'avg_per_buyer': round(data['quantity'] / data['buyers'], 2) if data['buyers'] > 0 else 0
+            }
+            for product, data in sorted_summary
+        ]
+    }
+
+def daily_sales_payload(sales_series):
+    """Construit la réponse JSON des ventes par période."""
+    return {
+        'granularity': sales_series.granularity,
+        'timezone': sales_series.timezone,
+        'rolling_window': sales_series.rolling_window,
+        'periods': [
+            {
+                'period': label,
+                'order_count': order_count,
+                'revenue': round(revenue, 2),
+                'revenue_delta': round(delta, 2),
+                'rolling_revenue': round(rolling, 2),
+                'cumulative_revenue': round(cumulative, 2)
+            }
+            for label, order_count, revenue, delta, rolling, cumulative in sales_series.rows()
+        ]
+    }
+
+def parrains_payload(parrain_sales, unmatched):
+    """Construit la réponse JSON du classement des codes parrains."""
+    sorted_sales = sorted(parrain_sales.items(), key=lambda x: x[1]['quantity'], reverse=True)
+    return {
+        'ranking': [
+            {'rank': rank, 'code': code, 'quantity': data['quantity'], 'revenue': to_amount(data['revenue'])}
+            for rank, (code, data) in enumerate(sorted_sales, 1)
+        ],
+        'unmatched': dict(unmatched.most_common()) if unmatched is not None else None
+    }
+
+def dashboard_html(summary_html, daily_sales_html, parrain_sales_html, num_orders):
+    """Construit la page HTML du tableau de bord.
+
+    La page ne contient pas l'heure de calcul : son ETag ne change que si les données changent.
+    """
+    operation_name = escape(app_config.helloasso['operation'])
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"/><title>{operation_name} - Résumé des ventes</title></head><body>
+    <h1>{operation_name}</h1>
+    <p>Résumé des ventes, {num_orders} commandes :</p>
+    {summary_html}
+    <p><img src="/chart.png" alt="Graphique des ventes" style="max-width: 100%;"/></p>
+    {daily_sales_html}
+    {parrain_sales_html}
+</body></html>"""
+
+def make_resource(content_type, body):
+    """Prépare une ressource servie : type, contenu et ETag."""
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    return {'content_type': content_type, 'body': body, 'etag': etag}
+
+def json_resource(payload):
+    """Prépare une ressource JSON."""
+    return make_resource('application/json; charset=utf-8', json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+
+def html_resource(html):
+    """Prépare une ressource HTML."""
+    return make_resource('text/html; charset=utf-8', html.encode('utf-8'))
+
+def build_snapshot(orders):
+    """Calcule les agrégats et pré-rend toutes les ressources servies pour une liste de commandes.
+
+    L'heure de calcul n'est incluse que dans /api/status et l'en-tête X-Generated-At, pour que les
+    ETag des autres ressources restent stables tant que les données ne changent pas. Les calculs
+    tournent sans barre de progression, qui se mêlerait aux logs du serveur.
+    """
+    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    num_orders = len(orders)
+
+    summary, total_revenue, total_profit = calculate_sales_summary(orders, show_progress=False)
+    sales_series = build_sales_series(orders)
+    parrain_resolver = build_parrain_resolver()
+    parrain_sales = get_best_seller(orders, parrain_resolver, show_progress=False)
+    unmatched = parrain_resolver.unmatched if parrain_resolver else None
+
+    chart = io.BytesIO()
+    plot_sales_over_time(sales_series, chart)
+
+    summary_html = generate_summary_html_table(summary, total_revenue, total_profit)
+    daily_sales_html = generate_daily_sales_table_html(sales_series)
+    parrain_sales_html = generate_parrain_sales_table_html(parrain_sales)
+
+    resources = {
+        '/': html_resource(dashboard_html(summary_html, daily_sales_html, parrain_sales_html, num_orders)),
+        '/chart.png': make_resource('image/png', chart.getvalue()),
+        '/tables/summary.html': html_resource(summary_html),
+        '/tables/daily-sales.html': html_resource(daily_sales_html),
+        '/tables/parrains.html': html_resource(parrain_sales_html),
+        '/api/summary': json_resource(summary_payload(summary, total_revenue, total_profit, num_orders)),
+        '/api/daily-sales': json_resource(daily_sales_payload(sales_series)),
+        '/api/parrains': json_resource(parrains_payload(parrain_sales, unmatched)),
+        '/api/status': json_resource({'generated_at': generated_at, 'num_orders': num_orders})
+    }
+    return {'generated_at': generated_at, 'resources': resources}
+
+class ReportState:
+    """État en mémoire partagé entre le serveur et le rafraîchissement en arrière-plan.
+
+    Chaque rafraîchissement construit un nouvel instantané puis remplace la référence en une
+    seule affectation : les lecteurs n'attendent jamais et voient toujours un instantané complet.
+    """
+    def __init__(self, load_orders):
+        self.load_orders = load_orders
+        self.snapshot = {'generated_at': None, 'resources': {}}
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load(self):
+        """Recharge les commandes et remplace l'instantané courant."""
+        with self._refresh_lock:
+            self.snapshot = build_snapshot(self.load_orders())
+
+    def refresh(self):
+        """Rafraîchit l'instantané ; en cas d'erreur, l'ancien reste servi."""
+        try:
+            self.load()
+        except Exception as e:
+            logger.error(f"Erreur lors du rafraîchissement des données : {e}")
+            return False
+        logger.info("Données du tableau de bord rafraîchies.")
+        return True
+
+    def start_background_refresh(self, interval_seconds):
+        """Lance le rafraîchissement périodique dans un thread démon."""
+        def run():
+            while not self._stop.wait(interval_seconds):
+                self.refresh()
+        self._thread = threading.Thread(target=run, name="report-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=STOP_TIMEOUT_SECONDS):
+        """Arrête le rafraîchissement périodique, sans attendre plus de timeout secondes.
+
+        Un rafraîchissement en cours (appel à l'API) n'est pas interrompu : le thread étant un
+        démon, il est abandonné à la sortie du programme.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning("Rafraîchissement en cours abandonné à l'arrêt.")
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """Sert les ressources pré-calculées de l'instantané courant, avec prise en charge des ETag."""
+    state = None
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path != '/':
+            path = path.rstrip('/')
+        snapshot = self.state.snapshot
+        resource = snapshot['resources'].get(path)
+        if resource is None:
+            self.send_error(404, "Ressource introuvable")
+            return
+
+        if_none_match = self.headers.get('If-None-Match', '')
+        if resource['etag'] in (tag.strip() for tag in if_none_match.split(',')) or if_none_match.strip() == '*':
+            self.send_response(304)
+            self.send_header('ETag', resource['etag'])
+            self.send_header('X-Generated-At', snapshot['generated_at'])
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', resource['content_type'])
+        self.send_header('Content-Length', str(len(resource['body'])))
+        self.send_header('ETag', resource['etag'])
+        self.send_header('X-Generated-At', snapshot['generated_at'])
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(resource['body'])
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+def create_server(state, host, port):
+    """Crée le serveur HTTP multi-thread associé à un état."""
+    handler = type('BoundReportRequestHandler', (ReportRequestHandler,), {'state': state})
+    return ThreadingHTTPServer((host, port), handler)
+
+def serve():
+    """Charge les données une fois, puis sert le tableau de bord et l'API jusqu'à interruption."""
+    state = ReportState(fetch_orders)
+    logger.info("Chargement initial des commandes...")
+    state.load()
+
+    host, port = app_config.server['host'], app_config.server['port']
+    httpd = create_server(state, host, port)
+    state.start_background_refresh(app_config.server['refresh_minutes'] * 60)
+    logger.info(f"Tableau de bord disponible sur http://{host}:{port}/")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Arrêt du serveur...")
+    finally:
+        httpd.server_close()
+        state.stop()
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+import numpy as np
+import pandas as pd
+from dateutil import parser
+
+from src.config import app_config
+
+# Pas de chaque granularité, format d'affichage et libellé de la colonne de période
+GRANULARITIES = {
+    'hour': {'step': pd.Timedelta(hours=1), 'format': '%Y-%m-%d %H:00', 'label': 'Heure', 'name': 'par heure'},
+    'day': {'step': pd.Timedelta(days=1), 'format': '%Y-%m-%d', 'label': 'Date', 'name': 'par jour'},
+    'week': {'step': pd.Timedelta(weeks=1), 'format': '%Y-%m-%d', 'label': 'Semaine du', 'name': 'par semaine'}
+}
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+def parse_timestamp(date_str):
+    """Convertit une date ISO-8601 en microsecondes depuis l'epoch (UTC).
+
+    datetime.fromisoformat couvre le format renvoyé par l'API ; dateutil ne sert qu'en secours
+    (« Z » ou fractions de seconde à 7 chiffres avant Python 3.11). Une date sans fuseau est
+    considérée en UTC.
+    """
+    try:
+        moment = datetime.fromisoformat(date_str)
+    except ValueError:
+        moment = parser.isoparse(date_str)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=dt_timezone.utc)
+    return (moment - EPOCH) // MICROSECOND
+
+def parse_order_timestamps(date_strings):
+    """Convertit les dates des commandes en instants UTC, en une seule passe."""
+    micros = np.fromiter((parse_timestamp(date_str) for date_str in date_strings), dtype=np.int64, count=len(date_strings))
+    return pd.Series(pd.to_datetime(micros, unit='us', utc=True))
+
+def bucket_timestamps(timestamps, timezone, granularity):
+    """Rattache chaque instant au début de sa période (heure, jour ou semaine commençant le lundi).
+
+    Les heures sont renvoyées en instants UTC naïfs, espacés d'une heure exactement : aux
+    changements d'heure, l'heure locale inexistante n'a pas de période et l'heure répétée en a
+    deux. Les jours et les semaines sont renvoyés en dates locales naïves.
+    """
+    local = timestamps.dt.tz_convert(timezone).dt.tz_localize(None)
+    if granularity == 'hour':
+        offset_in_hour = local - local.dt.floor('h')
+        return (timestamps - offset_in_hour).dt.tz_localize(None)
+    day = local.dt.normalize()
+    if granularity == 'week':
+        return day - pd.to_timedelta(day.dt.dayofweek, unit='D')
+    return day
+
+def rolling_mean(values, window):
+    """Moyenne mobile sur window périodes (fenêtre partielle en début de série)."""
+    sums = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(end - window, 0)
+    return (sums[end] - sums[start]) / (end - start)
+
+class SalesTimeSeries:
+    """Série temporelle des ventes, stockée dans des tableaux contigus (montants en centimes).
+
+    Les périodes sans vente sont présentes avec des valeurs nulles ; les métriques dérivées
+    (cumul, moyenne mobile, variation par rapport à la période précédente) sont calculées
+    une fois, à la construction.
+    """
+    def __init__(self, buckets, revenue, order_count, granularity, timezone, rolling_window):
+        self.buckets = buckets
+        self.revenue = revenue
+        self.order_count = order_count
+        self.granularity = granularity
+        self.timezone = timezone
+        self.rolling_window = rolling_window
+        self.cumulative_revenue = np.cumsum(revenue)
+        self.rolling_revenue = rolling_mean(revenue, rolling_window)
+        self.revenue_delta = np.diff(revenue, prepend=revenue[:1])
+
+    def __len__(self):
+        return len(self.buckets)
+
+    @property
+    def period_label(self):
+        """Libellé de la colonne de période (« Date », « Heure », « Semaine du »)."""
+        return GRANULARITIES[self.granularity]['label']
+
+    @property
+    def period_name(self):
+        """Nom de la granularité pour les titres (« par jour », ...)."""
+        return GRANULARITIES[self.granularity]['name']
+
+    def labels(self):
+        """Libellés des périodes, dans l'ordre chronologique."""
+        return pd.DatetimeIndex(self.buckets).strftime(GRANULARITIES[self.granularity]['format']).tolist()
+
+    def rows(self):
+        """Retourne une ligne par période : (libellé, commandes, CA, variation, moyenne mobile, cumul), en euros."""
+        return list(zip(
+            self.labels(),
+            self.order_count.tolist(),
+            (self.revenue / 100).tolist(),
+            (self.revenue_delta / 100).tolist(),
+            (self.rolling_revenue / 100).tolist(),
+            (self.cumulative_revenue / 100).tolist()
+        ))
+
+def build_sales_series(orders, timezone=None, granularity=None, rolling_window=None):
+    """Construit la série temporelle des ventes à partir des commandes.
+
+    Les paramètres non fournis sont lus dans la section [timeseries] de la configuration.
+    """
+    timezone = timezone or app_config.timeseries['timezone']
+    granularity = granularity or app_config.timeseries['granularity']
+    rolling_window = rolling_window or app_config.timeseries['rolling_window']
+
+    amounts = np.fromiter((order['amount']['total'] for order in orders), dtype=np.int64, count=len(orders))
+    if not len(amounts):
+        empty = np.array([], dtype=np.int64)
+        return SalesTimeSeries(np.array([], dtype='datetime64[ns]'), empty, empty, granularity, timezone, rolling_window)
+
+    timestamps = parse_order_timestamps([order['date'] for order in orders])
+    buckets = bucket_timestamps(timestamps, timezone, granularity).to_numpy()
+
+    # Périodes contiguës de la première à la dernière vente, périodes vides comprises
+    step = GRANULARITIES[granularity]['step'].to_timedelta64()
+    start = buckets.min()
+    positions = ((buckets - start) // step).astype(np.intp)
+    num_periods = int(positions.max()) + 1
+    index = start + np.arange(num_periods) * step
+    if granularity == 'hour':
+        # Instants UTC convertis en heure locale pour l'affichage
+        index = pd.DatetimeIndex(index).tz_localize('UTC').tz_convert(timezone).tz_localize(None).to_numpy()
+
+    order_count = np.bincount(positions, minlength=num_periods).astype(np.int64)
+    revenue = np.zeros(num_periods, dtype=np.int64)
+    np.add.at(revenue, positions, amounts)
+    return SalesTimeSeries(index, revenue, order_count, granularity, timezone, rolling_window)
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# src.config charge la configuration à l'import : on lui fournit un fichier de test.
+TEST_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.test.ini')
+os.environ['HELLOASSO_CONFIG'] = TEST_CONFIG
+
+@pytest.fixture
+def app_config(monkeypatch, tmp_path):
+    """Configuration de l'application, avec des fichiers de sortie dans un répertoire temporaire."""
+    from src.config import app_config
+    monkeypatch.setattr(app_config, 'script_dir', str(tmp_path))
+    return app_config
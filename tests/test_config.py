@@ -0,0 +1,21 @@
+import configparser
+
+from src.config import get_recipients_config
+
+def test_recipients_ignore_default_section():
+    config = configparser.ConfigParser()
+    config.read_string("""
+[DEFAULT]
+timezone = Europe/Paris
+
+[email]
+recipient = a@example.com, b@example.com
+
+[recipients]
+tresorier@example.com = Sapin, Coquille artisanale
+""")
+    assert get_recipients_config(config) == [
+        {'email': 'a@example.com', 'products': None},
+        {'email': 'b@example.com', 'products': None},
+        {'email': 'tresorier@example.com', 'products': ['Sapin', 'Coquille artisanale']}
+    ]
@@ -0,0 +1,151 @@
+import csv
+import email
+import gzip
+import io
+import random
+import smtplib
+import socket
+import zipfile
+
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+from src import delivery
+from src.processing import calculate_sales_summary
+from src.reporting import build_orders_rows
+from src.timeseries import build_sales_series
+
+PNG_DATA = b'\x89PNG\r\n\x1a\nfake-png'
+
+class RecordingHandler:
+    """Serveur SMTP de test : enregistre les messages et les sessions."""
+    def __init__(self):
+        self.envelopes = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        self.envelopes.append(envelope)
+        return '250 OK'
+
+def accept_all(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def smtp_server(app_config, monkeypatch):
+    """Démarre un serveur aiosmtpd local et redirige SMTP_SSL vers une connexion SMTP en clair."""
+    handler = RecordingHandler()
+    port = free_port()
+    controller = Controller(
+        handler, hostname='127.0.0.1', port=port,
+        authenticator=accept_all, auth_require_tls=False
+    )
+    controller.start()
+
+    connections = []
+    def plain_smtp(host, port_, context=None):
+        connection = smtplib.SMTP('127.0.0.1', port)
+        connections.append(connection)
+        return connection
+    monkeypatch.setattr(delivery.smtplib, 'SMTP_SSL', plain_smtp)
+    monkeypatch.setitem(app_config.smtp, 'port', port)
+
+    handler.connections = connections
+    yield handler
+    controller.stop()
+
+@pytest.fixture
+def report(app_config, tmp_path):
+    """Commandes de test (assez nombreuses pour dépasser le seuil de compression) et agrégats associés."""
+    rng = random.Random(0)
+    orders = []
+    for i in range(200):
+        product = 'Coquille artisanale' if i % 2 else 'Sapin'
+        orders.append({
+            'id': i,
+            'date': f"2024-11-{rng.randint(1, 28):02d}T10:00:00+01:00",
+            'amount': {'total': 400},
+            'payer': {'email': f"acheteur{i}@example.com", 'firstName': 'Prénom', 'lastName': f"Nom{i:03d}"},
+            'items': [{'name': product, 'quantity': 1, 'amount': {'total': 400}}]
+        })
+    (tmp_path / delivery.PLOT_FILENAME).write_bytes(PNG_DATA)
+    summary, total_revenue, total_profit = calculate_sales_summary(orders)
+    return (build_orders_rows(orders), summary, {}, total_revenue, total_profit, build_sales_series(orders))
+
+def parse(envelope):
+    return email.message_from_bytes(envelope.content)
+
+def attachments(msg):
+    return {part.get_filename(): part for part in msg.walk() if part.get('Content-Disposition', '').startswith('attachment')}
+
+def test_all_messages_share_one_connection(smtp_server, report):
+    sent = delivery.send_reports(*report)
+
+    assert sent == 3
+    assert len(smtp_server.connections) == 1
+    assert len(smtp_server.sessions) == 1
+    assert sorted(rcpt for envelope in smtp_server.envelopes for rcpt in envelope.rcpt_tos) == [
+        'a@example.com', 'b@example.com', 'tresorier@example.com'
+    ]
+
+def test_plot_is_embedded_once(smtp_server, report):
+    delivery.send_reports(*report)
+
+    for envelope in smtp_server.envelopes:
+        images = [part for part in parse(envelope).walk() if part.get_content_type() == 'image/png']
+        assert len(images) == 1
+        assert images[0]['Content-ID'] == '<sales_plot>'
+        assert images[0].get_payload(decode=True) == PNG_DATA
+
+def test_csv_attachments_are_zipped_above_threshold(smtp_server, report):
+    delivery.send_reports(*report)
+
+    files = attachments(parse(smtp_server.envelopes[0]))
+    assert set(files) == {'orders.zip', 'sales_summary.csv'}
+    with zipfile.ZipFile(io.BytesIO(files['orders.zip'].get_payload(decode=True))) as archive:
+        assert archive.namelist() == ['orders.csv']
+
+def test_filtered_recipient_gets_only_its_products(smtp_server, report):
+    delivery.send_reports(*report)
+
+    envelope = next(e for e in smtp_server.envelopes if e.rcpt_tos == ['tresorier@example.com'])
+    files = attachments(parse(envelope))
+    with zipfile.ZipFile(io.BytesIO(files['orders.zip'].get_payload(decode=True))) as archive:
+        rows = list(csv.reader(io.StringIO(archive.read('orders.csv').decode('utf-8'))))
+    assert rows[0] == delivery.ORDERS_CSV_BASE_COLUMNS + ['coquille artisanale']
+    assert len(rows) == 1 + 100
+    assert all(row[-1] == '1' for row in rows[1:])
+
+    summary_rows = list(csv.reader(io.StringIO(files['sales_summary.csv'].get_payload(decode=True).decode('utf-8'))))
+    assert [row[0] for row in summary_rows[1:]] == ['coquille artisanale', 'Total']
+
+@pytest.mark.parametrize('method, expected_name', [('zip', 'orders.zip'), ('gzip', 'orders.csv.gz')])
+def test_compress_attachment_above_threshold(method, expected_name):
+    data = b'Date,Nom\n' * 1000
+    name, compressed = delivery.compress_attachment('orders.csv', data, method, 1024)
+
+    assert name == expected_name
+    assert len(compressed) < len(data)
+    if method == 'gzip':
+        assert gzip.decompress(compressed) == data
+    else:
+        with zipfile.ZipFile(io.BytesIO(compressed)) as archive:
+            assert archive.read('orders.csv') == data
+
+@pytest.mark.parametrize('method', ['zip', 'gzip', 'none'])
+def test_compress_attachment_below_threshold(method):
+    data = b'Date,Nom\n'
+    assert delivery.compress_attachment('orders.csv', data, method, 1024) == ('orders.csv', data)
+
+def test_unknown_recipient_product_is_reported(smtp_server, report, app_config, monkeypatch, caplog):
+    monkeypatch.setattr(app_config, 'recipients', [{'email': 'c@example.com', 'products': ['Coquile']}])
+
+    delivery.send_reports(*report)
+
+    assert "Produits inconnus dans [recipients] pour c@example.com : coquile." in caplog.text
@@ -0,0 +1,129 @@
+import random
+import string
+
+import pytest
+
+from src import parrains
+from src.parrains import NGramIndex, ParrainResolver, levenshtein_distance, load_parrain_roster
+
+def random_word(rng, min_length, max_length):
+    return ''.join(rng.choices('ABCDE', k=rng.randint(min_length, max_length)))
+
+def add_typo(word, rng):
+    pos = rng.randrange(len(word) + 1)
+    letter = rng.choice(string.ascii_uppercase)
+    return rng.choice([
+        word[:pos] + letter + word[pos + 1:],
+        word[:pos] + word[pos + 1:],
+        word[:pos] + letter + word[pos:]
+    ])
+
+def brute_force(words, query, max_distance):
+    results = set()
+    for word in words:
+        distance = levenshtein_distance(query, word)
+        if distance <= max_distance:
+            results.add((distance, word))
+    return results
+
+@pytest.mark.parametrize('max_distance', [0, 1, 2, 3])
+def test_index_search_matches_brute_force(max_distance):
+    # Petit alphabet : beaucoup de n-grammes communs et de codes proches les uns des autres
+    rng = random.Random(max_distance)
+    words = sorted({random_word(rng, 1, 8) for _ in range(300)})
+    index = NGramIndex(words)
+
+    queries = [add_typo(rng.choice(words), rng) for _ in range(150)]
+    queries += [random_word(rng, 0, 8) for _ in range(150)]
+    for query in queries:
+        assert set(index.search(query, max_distance)) == brute_force(words, query, max_distance), query
+
+def test_short_query_falls_back_to_all_words():
+    words = ['AB', 'ABC', 'XYZ', 'LONGCODE']
+    index = NGramIndex(words)
+
+    # len('AB') + 3 - 1 - 2 * 3 <= 0 : le filtre par n-grammes ne peut rien exclure
+    assert list(index.candidates('AB', 2)) == [0, 1, 2, 3]
+    assert set(index.search('AB', 2)) == {(0, 'AB'), (1, 'ABC')}
+    assert set(index.search('Q', 2)) == {(2, 'AB')}
+
+def test_levenshtein_distance():
+    assert levenshtein_distance('DUPONT', 'DUPONT') == 0
+    assert levenshtein_distance('DUPONT', 'DUPOND') == 1
+    assert levenshtein_distance('DUPONT', 'DUPONTE') == 1
+    assert levenshtein_distance('', 'ABC') == 3
+    assert levenshtein_distance('ABCDEFGH', 'ZYXWVUTS') == 8
+
+def test_levenshtein_distance_stops_above_max_distance():
+    # Arrêt dès qu'une ligne dépasse la borne, et avant tout calcul si les longueurs l'imposent
+    assert levenshtein_distance('ABCDEFGH', 'ZYXWVUTS', max_distance=2) == 3
+    assert levenshtein_distance('A', 'ABCDEF', max_distance=2) == 3
+    assert levenshtein_distance('DUPONT', 'DUPOND', max_distance=2) == 1
+    assert levenshtein_distance('DUPONT', 'DUPOND', max_distance=0) == 1
+
+def test_resolve_is_memoized_but_counts_every_unmatched_answer(monkeypatch):
+    resolver = ParrainResolver(['DUPONT 4B', 'MARTIN 5A'])
+    calls = []
+    match = resolver._match
+    monkeypatch.setattr(resolver, '_match', lambda code: calls.append(code) or match(code))
+
+    assert resolver.resolve('dupond 4e b') == 'DUPONT 4B'
+    assert resolver.resolve('dupond 4e b') == 'DUPONT 4B'
+    assert resolver.resolve('inconnu 3c') == 'INCONNU 3C'
+    assert resolver.resolve('inconnu 3c') == 'INCONNU 3C'
+
+    assert calls == ['DUPOND 4B', 'INCONNU 3C']
+    assert resolver.unmatched == {'INCONNU 3C': 2}
+
+def test_empty_answer_is_not_reported():
+    resolver = ParrainResolver(['DUPONT 4B'])
+
+    assert resolver.resolve('') == ''
+    assert resolver.resolve('   ') == ''
+    assert not resolver.unmatched
+
+@pytest.mark.parametrize('answer', ['LU 4C', 'li 3b', 'DUPONT 4C'])
+def test_class_must_match_exactly(answer):
+    resolver = ParrainResolver(['LI 4B', 'DUPONT 4B'])
+
+    assert resolver.resolve(answer) == answer.upper()
+    assert resolver.unmatched == {answer.upper(): 1}
+
+def test_same_name_in_other_classes_is_not_picked():
+    resolver = ParrainResolver(['MARTIN 5A', 'MARTIN 5B'])
+
+    assert resolver.resolve('martin 5c') == 'MARTIN 5C'
+    assert resolver.resolve('martinn 5 b') == 'MARTIN 5B'
+    assert resolver.unmatched == {'MARTIN 5C': 1}
+
+def test_name_typo_within_the_same_class_is_corrected():
+    resolver = ParrainResolver(['LI 4B', 'DUPONT 4B', 'DUPONT 3A'])
+
+    assert resolver.resolve('dupond 4e b') == 'DUPONT 4B'
+    assert resolver.resolve('dupond 3 a') == 'DUPONT 3A'
+    assert not resolver.unmatched
+
+def test_codes_without_class_are_matched_on_the_whole_code():
+    resolver = ParrainResolver(['PARRAIN123', 'DUPONT 4B'])
+
+    assert resolver.resolve('parain123') == 'PARRAIN123'
+    assert resolver.resolve('dupont') == 'DUPONT'
+    assert resolver.unmatched == {'DUPONT': 1}
+
+def test_load_parrain_roster(app_config, tmp_path):
+    (tmp_path / 'parrains.txt').write_text(
+        "# Liste des parrains\n"
+        "dupont 4e b\n"
+        "\n"
+        "  # Commentaire indenté\n"
+        "DUPONT 4B\n"
+        "Martin  5 a\n"
+        "O#BRIEN 3C\n",
+        encoding='utf-8'
+    )
+
+    assert load_parrain_roster('parrains.txt') == ['DUPONT 4B', 'MARTIN 5A', 'O#BRIEN 3C']
+
+def test_build_parrain_resolver_without_roster(app_config, monkeypatch):
+    monkeypatch.setitem(app_config.parrain_roster, 'roster_file', None)
+    assert parrains.build_parrain_resolver() is None
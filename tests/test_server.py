@@ -0,0 +1,122 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+import pytest
+
+from src import api, processing, server
+
+def make_orders(parrain_answer='dupont 4e b'):
+    return [
+        {
+            'id': 1,
+            'date': '2024-11-05T10:00:00+01:00',
+            'amount': {'total': 2900},
+            'payer': {'email': 'acheteur@example.com'},
+            'items': [
+                {'name': 'Sapin', 'quantity': 1, 'amount': {'total': 2500}},
+                {'name': 'Coquille artisanale', 'quantity': 1, 'amount': {'total': 400}},
+                {'name': "J'ai un parrain", 'quantity': 1, 'amount': {'total': 0},
+                 'customFields': [{'answer': parrain_answer}]}
+            ]
+        }
+    ]
+
+@pytest.fixture
+def running_server(app_config):
+    """Serveur HTTP local servant un état construit à partir de make_orders."""
+    state = server.ReportState(make_orders)
+    state.load()
+    httpd = server.create_server(state, '127.0.0.1', 0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield state, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def get(url, etag=None):
+    headers = {'If-None-Match': etag} if etag else {}
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+            return response.status, response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers
+
+class LaterDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2030, 1, 1, 12, 0, 0)
+
+def test_etags_survive_refresh_with_unchanged_orders(running_server, monkeypatch):
+    state, base_url = running_server
+    paths = ['/', '/chart.png', '/tables/summary.html', '/tables/parrains.html',
+             '/api/summary', '/api/daily-sales', '/api/parrains']
+    etags = {path: get(base_url + path)[1]['ETag'] for path in paths}
+
+    monkeypatch.setattr(server, 'datetime', LaterDatetime)
+    state.refresh()
+
+    assert state.snapshot['generated_at'] == '2030-01-01 12:00:00'
+    for path in paths:
+        status, headers = get(base_url + path, etags[path])
+        assert status == 304, path
+        assert headers['X-Generated-At']
+
+def test_unknown_path_returns_404(running_server):
+    _, base_url = running_server
+    assert get(base_url + '/nope')[0] == 404
+
+def test_parrain_codes_are_escaped(app_config):
+    snapshot = server.build_snapshot(make_orders('<img src=x onerror=alert(1)>'))
+
+    body = snapshot['resources']['/']['body'].decode('utf-8')
+    assert '<IMG' not in body
+    assert '&lt;IMG SRC=X ONERROR=ALERT(1)&gt;' in body
+
+def test_snapshot_can_be_built_outside_main_thread(app_config):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(server.build_snapshot(make_orders())))
+    thread.start()
+    thread.join()
+
+    assert result['resources']['/chart.png']['body'].startswith(b'\x89PNG')
+
+def test_stop_does_not_wait_for_a_blocked_refresh():
+    refreshing = threading.Event()
+    release = threading.Event()
+    def blocked_load_orders():
+        refreshing.set()
+        release.wait()
+        return make_orders()
+    state = server.ReportState(blocked_load_orders)
+    state.start_background_refresh(0.01)
+    assert refreshing.wait(5)
+
+    start = time.monotonic()
+    state.stop(timeout=0.1)
+    assert time.monotonic() - start < 2
+    release.set()
+    state._thread.join()
+
+def test_snapshot_does_not_draw_progress_bars(app_config, monkeypatch):
+    progress_bars = []
+    class RecordingProgress(processing.Progress):
+        def __init__(self, *args, **kwargs):
+            progress_bars.append(kwargs.get('disable', False))
+            super().__init__(*args, **kwargs)
+    monkeypatch.setattr(processing, 'Progress', RecordingProgress)
+
+    server.build_snapshot(make_orders())
+
+    assert progress_bars == [True, True]
+
+def test_fetch_orders_uses_cache_without_token(monkeypatch):
+    orders = make_orders()
+    monkeypatch.setattr(api, 'load_cached_orders', lambda: orders)
+    def no_token():
+        raise AssertionError("le jeton ne doit pas être demandé")
+    monkeypatch.setattr(api, 'get_access_token', no_token)
+
+    assert api.fetch_orders() is orders
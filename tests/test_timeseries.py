@@ -0,0 +1,55 @@
+import numpy as np
+
+from src.timeseries import build_sales_series, parse_order_timestamps
+
+def order(date, total):
+    return {'date': date, 'amount': {'total': total}}
+
+def test_orders_are_bucketed_by_local_day_with_gaps_filled(app_config):
+    series = build_sales_series([
+        order('2024-11-04T23:30:00Z', 1000),
+        order('2024-11-05T08:00:00.1234567+01:00', 500),
+        order('2024-11-08T12:00:00+01:00', 250)
+    ], timezone='Europe/Paris', granularity='day', rolling_window=7)
+
+    assert series.labels() == ['2024-11-05', '2024-11-06', '2024-11-07', '2024-11-08']
+    assert series.order_count.tolist() == [2, 0, 0, 1]
+    assert series.revenue.tolist() == [1500, 0, 0, 250]
+    assert series.cumulative_revenue.tolist() == [1500, 1500, 1500, 1750]
+    assert series.revenue_delta.tolist() == [0, -1500, 0, 250]
+    assert np.allclose(series.rolling_revenue, [1500, 750, 500, 437.5])
+
+def test_weeks_start_on_monday(app_config):
+    series = build_sales_series([
+        order('2024-11-06T10:00:00+01:00', 100),
+        order('2024-11-10T10:00:00+01:00', 100),
+        order('2024-11-11T10:00:00+01:00', 100)
+    ], timezone='Europe/Paris', granularity='week', rolling_window=2)
+
+    assert series.labels() == ['2024-11-04', '2024-11-11']
+    assert series.order_count.tolist() == [2, 1]
+
+def test_hours_skip_nonexistent_spring_forward_hour(app_config):
+    series = build_sales_series([
+        order('2024-03-31T01:30:00+01:00', 100),
+        order('2024-03-31T03:30:00+02:00', 200)
+    ], timezone='Europe/Paris', granularity='hour', rolling_window=2)
+
+    assert series.labels() == ['2024-03-31 01:00', '2024-03-31 03:00']
+    assert series.revenue.tolist() == [100, 200]
+
+def test_repeated_fall_back_hour_has_two_periods(app_config):
+    series = build_sales_series([
+        order('2024-10-27T02:30:00+02:00', 100),
+        order('2024-10-27T02:30:00+01:00', 200)
+    ], timezone='Europe/Paris', granularity='hour', rolling_window=2)
+
+    assert series.labels() == ['2024-10-27 02:00', '2024-10-27 02:00']
+    assert series.revenue.tolist() == [100, 200]
+
+def test_empty_orders(app_config):
+    assert build_sales_series([], timezone='UTC', granularity='day', rolling_window=7).rows() == []
+
+def test_parse_naive_timestamp_as_utc():
+    parsed = parse_order_timestamps(['2024-11-05T09:00:00', '2024-11-05T10:00:00+01:00'])
+    assert parsed[0] == parsed[1]